@@ -0,0 +1,266 @@
+# -*- coding: utf-8 -*-
+"""
+Shared model core for the ICH consciousness recovery calculators.
+
+Holds the logistic regression coefficients, development cohort ranges, shared
+page text and the prediction/warning helpers used by all Streamlit app
+variants, so the apps themselves only contain UI code.
+
+Nothing here depends on Streamlit, so the scoring functions can also be used
+from plain scripts and notebooks (e.g. external validation); the apps apply
+st.cache_data to them.
+"""
+
+from math import exp as _exp
+from types import MappingProxyType
+import numpy as np
+
+# =========================
+# Model coefficients
+# =========================
+# NOTE: Replace coefficients below if you refit / recalibrate the model.
+B0 = 5.706245
+B_AGE = -0.116444
+B_GCSP = 0.734351
+B_VOL = 0.005742
+B_IVH = -0.208413
+B_VENT = -1.470830
+B_MLS = -0.041931
+B_GLU = -0.166805
+
+# Ventricular enlargement is binary, so its term is folded into two intercepts;
+# the remaining continuous/ordinal terms are evaluated as a single dot product.
+_INT = np.array([B0, B0 + B_VENT], dtype=np.float64)
+_COEF = np.array([B_AGE, B_GCSP, B_VOL, B_IVH, B_MLS, B_GLU], dtype=np.float64)
+
+# Full coefficient vector in predictor order (age, gcsp, volume, ivh, vent, mls, glu)
+# for scoring many patients at once.
+_BATCH_COEF = np.array([B_AGE, B_GCSP, B_VOL, B_IVH, B_VENT, B_MLS, B_GLU], dtype=np.float64)
+
+# =========================
+# Development cohort ranges
+# =========================
+# Used ONLY for out-of-range warnings (not for calculations).
+# Read-only views, since the bound vectors below are derived from them at import.
+DEV_MINMAX = MappingProxyType({
+    "age": (16, 96),
+    "gcsp": (1, 8),
+    "volume": (0.0, 200.0),
+    "ivh": (0, 4),
+    "vent": (0, 1),
+    "mls": (0.0, 30.0),
+    "glu": (2.0, 30.0),
+})
+
+DEV_P1P99 = MappingProxyType({
+    "age": (25, 88),
+    "gcsp": (1, 8),
+    "volume": (10.0, 120.0),
+    "ivh": (0, 4),
+    "mls": (0.0, 20.0),
+    "glu": (4.0, 20.0),
+})
+
+# Bound vectors in predictor order, so all inputs are checked in one pass.
+# Predictors without a P1–P99 entry fall back to the min–max range.
+_KEYS = tuple(DEV_MINMAX)
+_MIN = np.array([DEV_MINMAX[k][0] for k in _KEYS], dtype=np.float64)
+_MAX = np.array([DEV_MINMAX[k][1] for k in _KEYS], dtype=np.float64)
+_P1 = np.array([DEV_P1P99.get(k, DEV_MINMAX[k])[0] for k in _KEYS], dtype=np.float64)
+_P99 = np.array([DEV_P1P99.get(k, DEV_MINMAX[k])[1] for k in _KEYS], dtype=np.float64)
+
+# warn_ranges relies on this to test only P1–P99 before building the red mask.
+assert ((_P1 >= _MIN) & (_P99 <= _MAX)).all(), "every P1–P99 range must lie within its min–max range"
+
+# Warning text depends only on the predictor, not on the entered value, so
+# every message is formatted once here and looked up by index.
+_RED_TPL = "**{k}** is outside the development cohort range ({lo}–{hi})."
+_YELLOW_TPL = "**{k}** is outside the typical range (approx. P1–P99: {lo}–{hi})."
+_RED_MSGS = tuple(_RED_TPL.format(k=k, lo=DEV_MINMAX[k][0], hi=DEV_MINMAX[k][1]) for k in _KEYS)
+_YELLOW_MSGS = tuple(
+    _YELLOW_TPL.format(k=k, lo=DEV_P1P99.get(k, DEV_MINMAX[k])[0], hi=DEV_P1P99.get(k, DEV_MINMAX[k])[1])
+    for k in _KEYS
+)
+
+# Observed development cohort distribution (min/median/P1/P99/max) used by the
+# cloud app for input defaults and its own out-of-range messages.
+OBSERVED_RANGES = {
+    "Age": {"min": 17.0, "p1": 32.3, "median": 57.0, "p99": 84.0, "max": 89.0},
+    "GCS_P": {"min": 1.0, "p1": 1.0, "median": 6.0, "p99": 8.0, "max": 8.0},
+    "Hematoma_volume": {
+        "min": 25.063675,
+        "p1": 26.7790338,
+        "median": 56.41256875,
+        "p99": 143.13293718000008,
+        "max": 173.4671222,
+    },
+    "IVH_grade": {"min": 0.0, "p1": 0.0, "median": 1.0, "p99": 4.0, "max": 4.0},
+    "Ventricle_enlargement": {"min": 0.0, "p1": 0.0, "median": 0.0, "p99": 1.0, "max": 1.0},
+    "Midline_shift": {"min": 0.0, "p1": 3.5, "median": 10.2, "p99": 19.968500000000006, "max": 22.8},
+    "Blood_glucose": {"min": 1.9, "p1": 5.015, "median": 8.8, "p99": 20.62500000000001, "max": 30.3},
+}
+# Read-only at both levels, since the bound vectors below are derived from it at import.
+OBSERVED_RANGES = MappingProxyType({k: MappingProxyType(v) for k, v in OBSERVED_RANGES.items()})
+
+# Bound vectors in input-form order, so all inputs are checked in one pass
+# and messages list predictors in the order they are entered.
+_OBS_KEYS = (
+    "Age",
+    "GCS_P",
+    "Hematoma_volume",
+    "IVH_grade",
+    "Ventricle_enlargement",
+    "Midline_shift",
+    "Blood_glucose",
+)
+_OBS_MIN = np.array([OBSERVED_RANGES[k]["min"] for k in _OBS_KEYS], dtype=np.float64)
+_OBS_MAX = np.array([OBSERVED_RANGES[k]["max"] for k in _OBS_KEYS], dtype=np.float64)
+_OBS_P1 = np.array([OBSERVED_RANGES[k]["p1"] for k in _OBS_KEYS], dtype=np.float64)
+_OBS_P99 = np.array([OBSERVED_RANGES[k]["p99"] for k in _OBS_KEYS], dtype=np.float64)
+
+# check_observed_ranges relies on the same nesting as warn_ranges.
+assert ((_OBS_P1 >= _OBS_MIN) & (_OBS_P99 <= _OBS_MAX)).all(), "every P1–P99 range must lie within its min–max range"
+
+# This module is imported once per process, so these arrays are already
+# singletons shared by every session; make them read-only so no session can
+# mutate another's model.
+for _a in (_INT, _COEF, _BATCH_COEF, _MIN, _MAX, _P1, _P99, _OBS_MIN, _OBS_MAX, _OBS_P1, _OBS_P99):
+    _a.flags.writeable = False
+del _a
+
+# =========================
+# Static page text
+# =========================
+# Shared by the SCI app variants so both pages show identical wording. The model
+# specification only interpolates the constant coefficients, so it is formatted once here.
+NOTICE_MD = """
+**Research/Educational Use Only.** This web-based calculator is intended for research and educational purposes and **must not**
+be used as a substitute for clinical judgment or to make medical decisions.
+
+**Model provenance.** The model was developed using a **single-center retrospective cohort (n = 516)** and has **not yet**
+undergone external validation.
+
+**Generalizability.** External validation and (if needed) recalibration are recommended before use in other settings or populations.
+
+**Out-of-range inputs.** If entered values are outside the development cohort range, predictions may involve extrapolation and
+should be interpreted with additional caution.
+"""
+
+PREDICTOR_DEFINITIONS_MD = """
+- **GCS‑Pupils score (GCS‑P):** Combined assessment of Glasgow Coma Scale and pupillary reactivity  
+- **Hematoma volume (mL)**  
+- **Intraventricular hemorrhage (IVH) grade (0–4):** 0 = none; 1 = <25%; 2 = 25–50%; 3 = 50–75%; 4 = >75% of ventricular volume  
+- **Ventricular enlargement:** 1 = yes, 0 = no  
+- **Midline shift (mm):** Maximum midline shift  
+- **Admission blood glucose (mmol/L)**
+"""
+
+MODEL_SPEC_MD = f"""
+The model uses the following form:
+
+- Linear predictor: **LP = β0 + Σ(βi · Xi)**
+- Probability: **P = 1 / (1 + exp(−LP))**
+
+Coefficients used in this app:
+
+- Intercept (β0): `{B0}`
+- Age (years): `{B_AGE}`
+- GCS‑Pupils score: `{B_GCSP}`
+- Hematoma volume (mL): `{B_VOL}`
+- IVH grade (0–4): `{B_IVH}`
+- Ventricular enlargement (0/1): `{B_VENT}`
+- Midline shift (mm): `{B_MLS}`
+- Admission blood glucose (mmol/L): `{B_GLU}`
+"""
+
+# =========================
+# Helpers
+# =========================
+def sigmoid(x: float) -> float:
+    # Clamp instead of catching OverflowError. Realistic LPs lie well inside
+    # [-40, 40], and sigmoid(±40) is already 0/1 to within 1e-17.
+    x = -40.0 if x < -40.0 else 40.0 if x > 40.0 else x
+    return 1.0 / (1.0 + _exp(-x))
+
+def predict_probability(age, gcsp, volume, ivh_grade, vent_enlarged, midline_shift, glucose):
+    # vent_enlarged selects one of the two precomputed intercepts, so only 0/1 is valid
+    if vent_enlarged not in (0, 1):
+        raise ValueError(f"vent_enlarged must be 0 or 1, got {vent_enlarged!r}")
+    x = np.array([age, gcsp, volume, ivh_grade, midline_shift, glucose], dtype=np.float64)
+    lp = float(_INT[int(vent_enlarged)] + _COEF @ x)
+    return sigmoid(lp), lp
+
+def predict_probability_batch(X):
+    """Vectorized predict_probability for validation/bootstrap workloads.
+
+    `X` is an (N, 7) array with columns in DEV_MINMAX key order (age, gcsp,
+    volume, ivh, vent, mls, glu), or a DataFrame with those column names in
+    any order. Returns an (N,) array of probabilities.
+    """
+    if hasattr(X, "columns"):
+        X = X[list(_KEYS)]
+    X = np.asarray(X, dtype=np.float64)
+    if X.ndim != 2 or X.shape[1] != len(_KEYS):
+        raise ValueError(f"expected an (N, {len(_KEYS)}) array, got shape {X.shape}")
+    # Same 0/1 contract as predict_probability, so both scorers accept the same rows
+    vent = X[:, _KEYS.index("vent")]
+    bad = ~np.isin(vent, (0, 1))
+    if bad.any():
+        raise ValueError(f"vent_enlarged must be 0 or 1, got {float(vent[bad][0])!r}")
+    lp = np.clip(X @ _BATCH_COEF + B0, -40.0, 40.0)
+    return 1.0 / (1.0 + np.exp(-lp))
+
+def copy_statement(age, gcsp, volume, ivh_grade, vent_enlarged, midline_shift, glucose, p):
+    return (
+        f"Predicted probability of 6-month postoperative consciousness recovery: {p*100:.1f}% "
+        f"(logistic regression model; predictors: age={age} years, GCS-P={gcsp}, hematoma volume={volume:.1f} mL, "
+        f"IVH grade={ivh_grade}, ventricular enlargement={vent_enlarged}, midline shift={midline_shift:.1f} mm, "
+        f"admission glucose={glucose:.1f} mmol/L). "
+        "For research/educational use only; not a substitute for clinical judgment. External validation recommended."
+    )
+
+def warn_ranges(values):
+    """Return (level, message) pairs for inputs outside the development cohort.
+
+    `values` maps each DEV_MINMAX key to its input value. Level is "red" for
+    values outside the observed min–max and "yellow" for values outside P1–P99.
+    """
+    vals = np.array([values[k] for k in _KEYS], dtype=np.float64)
+    # P1–P99 lies within min–max (asserted at import), so this single test
+    # covers both levels and the common all-in-range case returns immediately.
+    outside = (vals < _P1) | (vals > _P99)
+    if not outside.any():
+        return []
+    red = (vals < _MIN) | (vals > _MAX)
+    yellow = outside & ~red
+
+    return [("red", _RED_MSGS[j]) for j in np.flatnonzero(red)] + [
+        ("yellow", _YELLOW_MSGS[j]) for j in np.flatnonzero(yellow)
+    ]
+
+def check_observed_ranges(values):
+    """Classify inputs against OBSERVED_RANGES for the cloud app.
+
+    `values` maps each OBSERVED_RANGES key to its input value. Returns
+    (reds, yellows): reds are (name, value, min, max) for values outside the
+    observed range, yellows are (name, value) for values outside P1–P99 only.
+    """
+    vals = np.array([values[k] for k in _OBS_KEYS], dtype=np.float64)
+    outside = (vals < _OBS_P1) | (vals > _OBS_P99)
+    if not outside.any():
+        return [], []
+    red = (vals < _OBS_MIN) | (vals > _OBS_MAX)
+    reds = [
+        (_OBS_KEYS[j], float(vals[j]), OBSERVED_RANGES[_OBS_KEYS[j]]["min"], OBSERVED_RANGES[_OBS_KEYS[j]]["max"])
+        for j in np.flatnonzero(red)
+    ]
+    yellows = [(_OBS_KEYS[j], float(vals[j])) for j in np.flatnonzero(outside & ~red)]
+    return reds, yellows
+
+def risk_band(p):
+    # Interpretive bands are for communication only (not a clinical guideline).
+    if p < 0.20:
+        return "Low"
+    if p < 0.50:
+        return "Intermediate"
+    return "High"